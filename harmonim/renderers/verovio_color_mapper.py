@@ -8,8 +8,22 @@ This module implements the "color hack" for robust ID mapping:
 4. Read mobject colors to recover IDs
 5. Restore original colors
 """
-import xml.etree.ElementTree as ET
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Tuple, Union
+
+import numpy as np
+from lxml import etree
+
+try:
+    from numba import njit
+except ImportError: # optional; match_color_keys falls back to NumPy
+    njit = None
+
+# Style properties overwritten by the injected color
+_COLOR_PROPS = ('fill', 'stroke', 'color')
+
+# Below this many colors NumPy's searchsorted is as fast as the Numba kernel
+# would be once compiled, and compiling it costs about a second
+_JIT_MIN_COLORS = 100_000
 
 
 class ColorIDMapper:
@@ -18,6 +32,7 @@ class ColorIDMapper:
     def __init__(self):
         self.id_to_color: Dict[str, str] = {}
         self.color_to_id: Dict[str, str] = {}
+        self._rgb_to_id: Dict[int, str] = {}  # packed 24-bit color -> ID
         self._color_counter = 1
     
     def get_unique_color(self, element_id: str) -> str:
@@ -40,6 +55,7 @@ class ColorIDMapper:
         
         self.id_to_color[element_id] = color_hex
         self.color_to_id[color_hex] = element_id
+        self._rgb_to_id[(r << 16) | (g << 8) | b] = element_id
         
         self._color_counter += 1
         
@@ -47,84 +63,160 @@ class ColorIDMapper:
     
     def get_id_from_rgb(self, r: float, g: float, b: float) -> str:
         """Recover ID from RGB values (0-1 range)."""
-        # Convert from 0-1 to 0-255
-        r_int = int(round(r * 255))
-        g_int = int(round(g * 255))
-        b_int = int(round(b * 255))
-        
-        color_hex = f"#{r_int:02x}{g_int:02x}{b_int:02x}"
+        key = (int(round(r * 255)) << 16) | (int(round(g * 255)) << 8) | int(round(b * 255))
+        return self._rgb_to_id.get(key, None)
+    
+    def get_key_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build a sorted lookup table for decoding many colors at once.
         
-        return self.color_to_id.get(color_hex, None)
+        Returns:
+            (keys, ids): uint32 keys (r << 16 | g << 8 | b) in ascending
+            order, and the element IDs they encode as a parallel object array
+        """
+        pairs = sorted(self._rgb_to_id.items())
+        keys = np.array([k for k, _ in pairs], dtype=np.uint32)
+        ids = np.array([eid for _, eid in pairs], dtype=object)
+        return keys, ids
+
+
+def _match_color_keys_numpy(rgb_u8: np.ndarray, sorted_keys: np.ndarray) -> np.ndarray:
+    keys = rgb_u8.astype(np.uint32) @ np.array([1 << 16, 1 << 8, 1], dtype=np.uint32)
+    idx = np.searchsorted(sorted_keys, keys)
+    idx[idx == len(sorted_keys)] = 0
+    matches = idx.astype(np.int32)
+    if len(sorted_keys):
+        matches[sorted_keys[idx] != keys] = -1
+    else:
+        matches[:] = -1
+    return matches
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _match_color_keys_jit(rgb_u8, sorted_keys):
+        n = rgb_u8.shape[0]
+        m = sorted_keys.shape[0]
+        matches = np.full(n, -1, dtype=np.int32)
+        for i in range(n):
+            key = (np.int64(rgb_u8[i, 0]) << 16) | (np.int64(rgb_u8[i, 1]) << 8) | np.int64(rgb_u8[i, 2])
+            lo, hi = 0, m
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if sorted_keys[mid] < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < m and sorted_keys[lo] == key:
+                matches[i] = lo
+        return matches
+
+
+def match_color_keys(rgb_u8: np.ndarray, sorted_keys: np.ndarray) -> np.ndarray:
+    """
+    Look up (N, 3) uint8 colors in a sorted table of r << 16 | g << 8 | b keys.
+    
+    Returns an int32 index into sorted_keys per color, -1 where it is absent.
+    Large batches run as a Numba kernel when numba is installed.
+    """
+    rgb_u8 = np.ascontiguousarray(rgb_u8, dtype=np.uint8)
+    if njit is not None and len(rgb_u8) >= _JIT_MIN_COLORS:
+        return _match_color_keys_jit(rgb_u8, np.ascontiguousarray(sorted_keys, dtype=np.uint32))
+    return _match_color_keys_numpy(rgb_u8, sorted_keys)
 
 
-def inject_colors_to_svg(svg_string: str, element_ids: list, color_mapper: ColorIDMapper) -> str:
+def inject_colors_to_svg(svg_string: str, element_ids: Iterable[str], color_mapper: ColorIDMapper,
+                         as_bytes: bool = False) -> Union[str, bytes]:
     """
     Inject unique colors into SVG for specified element IDs.
     
     Args:
         svg_string: Original SVG from Verovio
-        element_ids: List of IDs to colorize (typically note IDs)
+        element_ids: IDs to colorize (typically note IDs); a set or frozenset
+            is used as is, anything else is turned into one
         color_mapper: ColorIDMapper instance
+        as_bytes: Return UTF-8 bytes (ready to write to a binary file)
+            instead of a str
         
     Returns:
         Modified SVG string with unique colors
     """
-    root = ET.fromstring(svg_string)
+    # lxml keeps the document's own namespace prefixes, nothing to register
+    root = etree.fromstring(svg_string.encode('utf-8'))
     
-    # Register namespace to preserve it
-    ET.register_namespace('', 'http://www.w3.org/2000/svg')
-    ET.register_namespace('xlink', 'http://www.w3.org/1999/xlink')
-    
-    # Find and color each element
-    _inject_colors_recursive(root, element_ids, color_mapper)
+    inject_colors_to_tree(root, element_ids, color_mapper)
     
     # Convert back to string
-    return ET.tostring(root, encoding='unicode')
+    if as_bytes:
+        return etree.tostring(root, encoding='utf-8')
+    return etree.tostring(root, encoding='unicode')
 
 
-def _inject_colors_recursive(element: ET.Element, target_ids: list, color_mapper: ColorIDMapper, active_color: str = None):
-    """Recursively inject colors."""
-    # Check both 'id' and 'data-id'
-    element_id = element.get('data-id') or element.get('id')
+def inject_colors_to_tree(root: etree._Element, element_ids: Iterable[str], color_mapper: ColorIDMapper):
+    """
+    Same as inject_colors_to_svg, in place on an already parsed lxml tree.
     
-    # If we find a target ID, the active_color starts here
-    if element_id and element_id in target_ids:
-        active_color = color_mapper.get_unique_color(element_id)
+    For callers that have parsed the SVG anyway and would otherwise
+    serialize it only to have it parsed again.
+    """
+    # Membership is tested once per SVG element
+    if not isinstance(element_ids, (set, frozenset)):
+        element_ids = frozenset(element_ids)
     
-    if active_color:
-        # Inject color as fill AND stroke AND color
-        element.set('fill', active_color)
-        element.set('stroke', active_color)
-        element.set('color', active_color)
+    # Find and color each element
+    _inject_colors(root, element_ids, color_mapper)
+
+
+def _inject_colors(root: etree._Element, target_ids: frozenset, color_mapper: ColorIDMapper):
+    """Inject colors into target elements and everything below them."""
+    # Explicit stack of (element, inherited color), popped in document order
+    # so colors are handed out in the same order as the elements appear
+    stack = [(root, None)]
+    while stack:
+        element, active_color = stack.pop()
         
-        # Also add to style
-        style = element.get('style', '')
-        style_parts = [p.strip() for p in style.split(';') if p.strip()]
-        style_parts = [p for p in style_parts if not p.startswith('fill') and not p.startswith('stroke') and not p.startswith('color')]
-        style_parts.append(f'fill:{active_color}')
-        style_parts.append(f'stroke:{active_color}')
-        style_parts.append(f'color:{active_color}')
-        element.set('style', ';'.join(style_parts))
+        # Check both 'id' and 'data-id'
+        element_id = element.get('data-id') or element.get('id')
+        
+        # If we find a target ID, the active_color starts here
+        if element_id and element_id in target_ids:
+            active_color = color_mapper.get_unique_color(element_id)
+        
+        if active_color:
+            _set_color(element, active_color)
+        
+        # Elements only; comments cannot take attributes
+        stack.extend((child, active_color) for child in element.iterchildren(etree.Element, reversed=True))
+
+
+def _set_color(element: etree._Element, active_color: str):
+    """Set an element's fill, stroke and color, in attributes and style."""
+    # Inject color as fill AND stroke AND color
+    element.set('fill', active_color)
+    element.set('stroke', active_color)
+    element.set('color', active_color)
     
-    # Recurse
-    for child in element:
-        _inject_colors_recursive(child, target_ids, color_mapper, active_color)
+    # Also add to style
+    style = element.get('style')
+    style_parts = []
+    if style:
+        # One pass, and a single startswith against all replaced properties
+        style_parts = [p for p in map(str.strip, style.split(';')) if p and not p.startswith(_COLOR_PROPS)]
+    style_parts.append(f'fill:{active_color}')
+    style_parts.append(f'stroke:{active_color}')
+    style_parts.append(f'color:{active_color}')
+    element.set('style', ';'.join(style_parts))
 
 
 def extract_note_ids_from_svg(svg_string: str) -> list:
     """Extract all note element IDs from SVG."""
-    root = ET.fromstring(svg_string)
+    root = etree.fromstring(svg_string.encode('utf-8'))
     note_ids = []
     
-    def find_notes(elem):
-        data_class = elem.get('data-class', '')
+    # Document order, walked by libxml2 rather than Python recursion
+    for elem in root.iter(etree.Element):
         elem_id = elem.get('id')
-        
-        if 'note' in data_class and elem_id:
+        if elem_id and 'note' in elem.get('data-class', ''):
             note_ids.append(elem_id)
-        
-        for child in elem:
-            find_notes(child)
     
-    find_notes(root)
     return note_ids
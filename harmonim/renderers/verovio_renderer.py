@@ -2,16 +2,18 @@
 Verovio renderer for Harmonim.
 """
 import os
-import xml.etree.ElementTree as ET
-from typing import Any, Dict, Optional, Union, List
+import tempfile
+from typing import Any, Dict, Optional, Union, List, Tuple
 from pathlib import Path
 
+import numpy as np
 import verovio
+from lxml import etree
 from manim import SVGMobject, VMobject, VGroup, Mobject, BLACK
 
 from .base import Renderer, RenderOptions
 from ..core.config import config
-from .verovio_color_mapper import ColorIDMapper, inject_colors_to_svg, extract_note_ids_from_svg
+from .verovio_color_mapper import ColorIDMapper, inject_colors_to_tree, match_color_keys
 
 class VerovioRenderer(Renderer):
     """Renderer that uses Verovio to generate SVGs and maps them to Manim objects."""
@@ -27,6 +29,7 @@ class VerovioRenderer(Renderer):
             "font": "Bravura",
             "svgViewBox": True,
             "svgHtml5": True, # Adds data-id and data-class
+            "svgFormatRaw": True, # Unindented output, much less to parse
             "header": "none",
             "footer": "none"
         })
@@ -62,45 +65,50 @@ class VerovioRenderer(Renderer):
         # 2. Render to SVG string
         svg_string_original = self.tk.renderToSVG(1)
         
-        # 3. Convert data-id to id attributes
-        svg_string_with_ids = self._convert_data_ids_to_ids(svg_string_original)
+        # 3. Convert data-id to id attributes, collecting note IDs on the way.
+        # The parsed tree is kept for the color injection below, so the SVG
+        # is parsed and serialized only once
+        svg_root, note_ids = self._convert_data_ids_to_ids(svg_string_original)
         
         # 4. COLOR INJECTION - The key to robust ID mapping!
-        # Extract note IDs from SVG
-        note_ids = extract_note_ids_from_svg(svg_string_with_ids)
         print(f"DEBUG: Found {len(note_ids)} notes to colorize")
         
         # Create color mapper
         self.color_mapper = ColorIDMapper()
         
         # Inject unique colors for each note
-        svg_string_colored = inject_colors_to_svg(svg_string_with_ids, note_ids, self.color_mapper)
+        inject_colors_to_tree(svg_root, note_ids, self.color_mapper)
+        svg_string_colored = etree.tostring(svg_root, encoding='utf-8')
         
-        # 5. Save and load in Manim
-        temp_svg_path = Path(self.options.output_dir) / "temp_verovio_render.svg"
-        temp_svg_path.parent.mkdir(parents=True, exist_ok=True)
+        # 5. Save and load in Manim. A uniquely named file per render, so
+        # renders sharing an output_dir don't overwrite each other's SVG
+        output_dir = Path(self.options.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        with open(temp_svg_path, "w", encoding="utf-8") as f:
+        with tempfile.NamedTemporaryFile("wb", prefix="temp_verovio_render_", suffix=".svg",
+                                         dir=output_dir, delete=False) as f:
             f.write(svg_string_colored)
+        temp_svg_path = Path(f.name)
             
-        self.svg_mobject = SVGMobject(str(temp_svg_path))
-        
-        # 6. Map IDs by reading colors from mobjects!
-        self.map_ids_by_color(self.svg_mobject)
-        
-        # 7. Restore original colors (black)
-        self._fix_styles(self.svg_mobject)
-        
-        # Cleanup temp file
-        if not self.options.debug:
-            try:
-                os.remove(temp_svg_path)
-            except OSError:
-                pass
+        try:
+            self.svg_mobject = SVGMobject(str(temp_svg_path))
+            
+            # 6. Map IDs by reading colors from mobjects!
+            self.map_ids_by_color(self.svg_mobject)
+            
+            # 7. Restore original colors (black)
+            self._fix_styles(self.svg_mobject)
+        finally:
+            # Cleanup temp file, also when loading fails (kept for debugging)
+            if not self.options.debug:
+                try:
+                    os.remove(temp_svg_path)
+                except OSError:
+                    pass
                 
         return self.svg_mobject
     
-    def _convert_data_ids_to_ids(self, svg_string: str) -> str:
+    def _convert_data_ids_to_ids(self, svg_string: str) -> Tuple[etree._Element, List[str]]:
         """
         Convert data-id attributes to id attributes in SVG.
         
@@ -110,54 +118,59 @@ class VerovioRenderer(Renderer):
         Strategy:
         1. Parse the SVG XML
         2. For each element with data-id, also set it as id (if id doesn't exist)
-        3. Return modified SVG string
+        3. Return the modified tree, and the note IDs in document order
+           (same as extract_note_ids_from_svg on it, without a second parse)
         """
-        root = ET.fromstring(svg_string)
-        self._add_ids_recursive(root)
-        
-        # Convert back to string
-        result = ET.tostring(root, encoding='unicode')
-        return result
+        root = etree.fromstring(svg_string.encode('utf-8'))
+        note_ids = self._add_ids(root)
+        return root, note_ids
     
-    def _add_ids_recursive(self, element: ET.Element):
-        """Recursively add id attributes from data-id."""
-        # Check if element has data-id
-        data_id = element.get('data-id')
-        existing_id = element.get('id')
-        
-        if data_id and not existing_id:
-            # Set the id attribute to match data-id
-            element.set('id', data_id)
-        
-        # Recurse to children
-        for child in element:
-            self._add_ids_recursive(child)
+    def _add_ids(self, root: etree._Element) -> List[str]:
+        """Add id attributes from data-id throughout the tree; return the note IDs."""
+        note_ids = []
+        # Elements only; comments cannot take attributes
+        for element in root.iter(etree.Element):
+            elem_id = element.get('id')
+            if not elem_id:
+                elem_id = element.get('data-id')
+                if elem_id:
+                    # Set the id attribute to match data-id
+                    element.set('id', elem_id)
+            
+            if elem_id and 'note' in element.get('data-class', ''):
+                note_ids.append(elem_id)
+        return note_ids
 
 
     def _fix_styles(self, mobject: Mobject):
         """
         Fixes visibility issues with imported SVGs.
+        
+        Parents are styled before their children (set_color/set_stroke
+        recolor the whole family, children then override).
         """
-        if isinstance(mobject, VMobject):
-            # Force BLACK color for everything
-            mobject.set_color(BLACK)
-            
-            try:
-                current_sw = mobject.get_stroke_width()
-            except TypeError:
-                current_sw = 0
-            
-            # If it has no fill, it MUST have a stroke
-            if mobject.get_fill_opacity() == 0:
-                if current_sw < 1.5:
-                    mobject.set_stroke(width=1.5)
+        stack = [mobject]
+        while stack:
+            mob = stack.pop()
+            if isinstance(mob, VMobject):
+                # Force BLACK color for everything
+                mob.set_color(BLACK)
+                
+                try:
+                    current_sw = mob.get_stroke_width()
+                except TypeError:
+                    current_sw = 0
+                
+                # If it has no fill, it MUST have a stroke
+                if mob.get_fill_opacity() == 0:
+                    if current_sw < 1.5:
+                        mob.set_stroke(width=1.5)
+                
+                # If it has a stroke, ensure it's thick enough
+                if current_sw > 0 and current_sw < 1.5:
+                    mob.set_stroke(width=1.5)
             
-            # If it has a stroke, ensure it's thick enough
-            if current_sw > 0 and current_sw < 1.5:
-                mobject.set_stroke(width=1.5)
-
-        for sub in mobject.submobjects:
-            self._fix_styles(sub)
+            stack.extend(reversed(mob.submobjects))
 
     def map_ids_by_color(self, svg_mobject: SVGMobject):
         """
@@ -183,48 +196,32 @@ class VerovioRenderer(Renderer):
         
         mapped_count = 0
         
-        for mob in all_mobjects:
-            if not isinstance(mob, VMobject):
-                continue
-            
-            # Try to read color from fill
-            try:
-                fill_rgb = mob.get_fill_color()
-                if fill_rgb is not None and hasattr(fill_rgb, '__iter__'):
-                    if len(fill_rgb) >= 3:
-                        r, g, b = fill_rgb[0], fill_rgb[1], fill_rgb[2]
-                        
-                        # Try to recover ID
-                        note_id = self.color_mapper.get_id_from_rgb(r, g, b)
-                        
-                        if note_id:
-                            self.id_to_mobject[note_id] = mob
-                            mapped_count += 1
-                            continue
-            except:
-                pass
-            
-            # Try stroke color as fallback
-            try:
-                stroke_rgb = mob.get_stroke_color()
-                if stroke_rgb is not None and hasattr(stroke_rgb, '__iter__'):
-                    if len(stroke_rgb) >= 3:
-                        r, g, b = stroke_rgb[0], stroke_rgb[1], stroke_rgb[2]
-                        
-                        note_id = self.color_mapper.get_id_from_rgb(r, g, b)
-                        
-                        if note_id and note_id not in self.id_to_mobject:
-                            self.id_to_mobject[note_id] = mob
-                            mapped_count += 1
-            except:
-                pass
+        # Decode every fill and stroke color in one lookup each
+        vmobjects = [mob for mob in all_mobjects if isinstance(mob, VMobject)]
+        keys, ids = self.color_mapper.get_key_table()
+        fill_rgbs = np.array([mob.get_fill_rgbas()[0][:3] for mob in vmobjects]).reshape(-1, 3)
+        stroke_rgbs = np.array([mob.get_stroke_rgbas()[0][:3] for mob in vmobjects]).reshape(-1, 3)
+        fill_idx = match_color_keys(np.rint(fill_rgbs * 255).astype(np.uint8), keys)
+        stroke_idx = match_color_keys(np.rint(stroke_rgbs * 255).astype(np.uint8), keys)
+        
+        for mob, fi, si in zip(vmobjects, fill_idx, stroke_idx):
+            # Fill color first
+            if fi >= 0:
+                self.id_to_mobject[ids[fi]] = mob
+                mapped_count += 1
+            # Stroke color as fallback
+            elif si >= 0 and ids[si] not in self.id_to_mobject:
+                self.id_to_mobject[ids[si]] = mob
+                mapped_count += 1
         
         print(f"DEBUG: Successfully mapped {mapped_count} notes via color decoding")
     
     def _flatten_all(self, mobject: Mobject, result: list):
-        """Recursively flatten all mobjects."""
-        result.append(mobject)
-        for sub in mobject.submobjects:
-            self._flatten_all(sub, result)
+        """Flatten all mobjects, parents before their children."""
+        stack = [mobject]
+        while stack:
+            mob = stack.pop()
+            result.append(mob)
+            stack.extend(reversed(mob.submobjects))
 
 
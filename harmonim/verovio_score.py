@@ -12,10 +12,175 @@ This class solves the ID mapping problem by:
 from manim import *
 import verovio
 from typing import Dict, List, Optional
-import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from io import BytesIO
+import hashlib
+import json
+from lxml import etree
 from pathlib import Path
+import math
+import os
+import re
+import tempfile
+from types import MappingProxyType
 import numpy as np
-from harmonim.renderers.verovio_color_mapper import ColorIDMapper, inject_colors_to_svg
+from harmonim.renderers.verovio_color_mapper import ColorIDMapper, inject_colors_to_svg, match_color_keys
+
+try:
+    from numba import njit
+except ImportError: # optional; nearest_anchor falls back to NumPy
+    njit = None
+
+# Below this many targets NumPy beats compiling the nearest_anchor kernel
+# (about 0.6 s for a ~15 us per target saving)
+_JIT_MIN_TARGETS = 50_000
+
+# Namespaces of Verovio's MEI and SVG output
+_MEI_NS = "http://www.music-encoding.org/ns/mei"
+_SVG_NS = "http://www.w3.org/2000/svg"
+_XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+_NS = {'mei': _MEI_NS, 's': _SVG_NS}
+_SVG_G = f"{{{_SVG_NS}}}g"
+
+# Rendered SVG + MIDI map of previously loaded scores (see VerovioScore._cache_key)
+_CACHE_DIR = Path("~/.cache/harmonim").expanduser()
+# Part of the cache key: bump whenever the output of _extract_midi_data changes
+_CACHE_VERSION = 3
+
+# Default Verovio toolkit options (extend per instance with verovio_opts=)
+_VEROVIO_OPTS = MappingProxyType({
+    "scale": 50,
+    "adjustPageHeight": True,
+    "font": "Bravura",
+    "svgViewBox": True,
+    "svgHtml5": True,  # Preserves data-id
+    "xmlIdSeed": 1,    # Same element ids on every load (the disk cache relies on it)
+    "svgFormatRaw": True,  # No indentation/newlines: ~35% smaller SVG to parse
+    "noText": 1,       # Converts dynamic marks to paths
+    "header": "none",
+    "footer": "none"
+})
+
+# Added on top for scrolling=True: a single huge page for infinite scrolling
+_VEROVIO_SCROLLING_OPTS = MappingProxyType({
+    "pageWidth": 60000, 
+    "breaks": "none",
+    "spacingNonLinear": 0.0  # Force proportional spacing for constant speed
+})
+
+# MEI pitch names and accidentals -> semitones
+_PITCH_STEPS = {'c': 0, 'd': 2, 'e': 4, 'f': 5, 'g': 7, 'a': 9, 'b': 11}
+_ACCID_SEMITONES = {'s': 1, 'f': -1, 'ss': 2, 'x': 2, 'ff': -2, 'xs': 3, 'sx': 3, 'ts': 3, 'tf': -3, 'n': 0}
+
+# Number in a part id (P1, P2...)
+_PART_NUM_RE = re.compile(r'\d+')
+
+# Staff numbers of every staffDef below a staffGrp
+_STAFF_NS_XPATH = etree.XPath('.//mei:staffDef/@n', namespaces=_NS, smart_strings=False)
+
+_JSON_DECODE = json.JSONDecoder().decode
+
+# Samples per Bezier curve when measuring arc length (same resolution
+# VMobject.point_from_proportion uses internally)
+_ARC_SAMPLES = 10
+
+
+def _bezier_curves(mob: VMobject) -> np.ndarray:
+    """Return the control points of a VMobject as an (n_curves, n_ppc, dim) array."""
+    n_ppc = getattr(mob, 'n_points_per_cubic_curve', 4)
+    points = mob.points
+    n_curves = len(points) // n_ppc
+    if n_curves == 0:
+        raise ValueError("Cannot sample a mobject without points")
+    return points[:n_curves * n_ppc].reshape(n_curves, n_ppc, points.shape[1])
+
+
+def _bernstein(degree: int, ts: np.ndarray) -> np.ndarray:
+    """Bernstein basis evaluated at every t, shape (len(ts), degree + 1)."""
+    k = np.arange(degree + 1)
+    binom = np.array([math.comb(degree, i) for i in k], dtype=float)
+    ts = ts[:, None]
+    return binom * ts ** k * (1 - ts) ** (degree - k)
+
+
+def _precompute_arclength(mob: VMobject):
+    """
+    Build the arc-length table of a VMobject once.
+    
+    Returns (cum_lengths, segment_starts): the accumulated length at the end
+    and at the start of every Bezier curve of the path.
+    """
+    curves = _bezier_curves(mob)
+    basis = _bernstein(curves.shape[1] - 1, np.linspace(0, 1, _ARC_SAMPLES))
+    samples = np.einsum('tk,ckd->ctd', basis, curves)
+    lengths = np.linalg.norm(np.diff(samples, axis=1), axis=2).sum(axis=1)
+    cum_lengths = np.cumsum(lengths)
+    return cum_lengths, cum_lengths - lengths
+
+
+def point_from_proportion_batched(mob: VMobject, alphas, cum_lengths, segment_starts) -> np.ndarray:
+    """
+    Vectorized VMobject.point_from_proportion for many alphas at once.
+    
+    Uses the table from _precompute_arclength so the path is only walked once.
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    curves = _bezier_curves(mob)
+    target = alphas * cum_lengths[-1]
+    seg = np.minimum(np.searchsorted(cum_lengths, target), len(cum_lengths) - 1)
+    seg_lengths = cum_lengths[seg] - segment_starts[seg]
+    residue = np.zeros_like(target)
+    np.divide(target - segment_starts[seg], seg_lengths, out=residue, where=seg_lengths > 0)
+    basis = _bernstein(curves.shape[1] - 1, residue)
+    return np.einsum('ak,akd->ad', basis, curves[seg])
+
+
+def _nearest_anchor_numpy(xs: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    j = np.searchsorted(xs, targets)
+    left = xs[np.maximum(j - 1, 0)]
+    right = xs[np.minimum(j, len(xs) - 1)]
+    best = np.where(np.abs(targets - left) <= np.abs(right - targets), left, right)
+    # First of the anchors sharing the winning x
+    return np.searchsorted(xs, best)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _nearest_anchor_jit(xs, targets):
+        n = targets.shape[0]
+        m = xs.shape[0]
+        nearest = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            x = targets[i]
+            lo, hi = 0, m
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if xs[mid] < x:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            k = lo
+            if k == m or (k > 0 and abs(x - xs[k - 1]) <= abs(xs[k] - x)):
+                k -= 1
+            while k > 0 and xs[k - 1] == xs[k]:
+                k -= 1
+            nearest[i] = k
+        return nearest
+
+
+def nearest_anchor(xs: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Index of the anchor closest to each target x in a sorted array of xs.
+    
+    Ties go to the earliest anchor, as min() over the sorted list would.
+    Large batches run as a Numba kernel when numba is installed.
+    """
+    xs = np.ascontiguousarray(xs, dtype=float)
+    targets = np.ascontiguousarray(targets, dtype=float)
+    if njit is not None and len(targets) >= _JIT_MIN_TARGETS:
+        return _nearest_anchor_jit(xs, targets)
+    return _nearest_anchor_numpy(xs, targets)
 
 
 class VerovioScore(VGroup):
@@ -31,41 +196,36 @@ class VerovioScore(VGroup):
     
     def __init__(self, musicxml_path: str, **kwargs):
         self.scrolling = kwargs.pop("scrolling", False)
+        verovio_opts = kwargs.pop("verovio_opts", None) or {}
+        use_cache = kwargs.pop("cache", True)
         super().__init__(**kwargs)
         self.musicxml_path = str(musicxml_path)
         
-        # 1. Initialize Verovio
-        self.tk = verovio.toolkit()
-        
-        options = {
-            "scale": 50,
-            "adjustPageHeight": True,
-            "font": "Bravura",
-            "svgViewBox": True,
-            "svgHtml5": True,  # Preserves data-id
-            "noText": 1,       # Converts dynamic marks to paths
-            "header": "none",
-            "footer": "none"
-        }
+        # 1. Initialize Verovio. The score is loaded into it below, or on
+        # first use of self.tk when everything came from the cache
+        self._tk = verovio.toolkit()
+        self._tk_loaded = False
         
+        options = dict(_VEROVIO_OPTS)
         if self.scrolling:
-            # Create a single huge page for infinite scrolling
-            options.update({
-                "pageWidth": 60000, 
-                "breaks": "none",
-                "spacingNonLinear": 0.0  # Force proportional spacing for constant speed
-            })
+            options.update(_VEROVIO_SCROLLING_OPTS)
+        # Caller overrides win over the defaults
+        options.update(verovio_opts)
             
-        self.tk.setOptions(options)
+        self._tk.setOptions(options)
+        self._id_seed = options.get("xmlIdSeed")
         
-        if not self.tk.loadFile(self.musicxml_path):
-            raise ValueError(f"Could not load {musicxml_path}")
-        
-        # 2. Generate SVG
-        self.svg_string = self.tk.renderToSVG(1)
-        
-        # 3. Extract MIDI/timing data from Verovio
-        self.midi_data = self._extract_midi_data()
+        # 2-3. Reuse the SVG and MIDI map of an earlier run on the same input
+        cache_key = self._cache_key(options) if use_cache else None
+        if not (cache_key and self._load_cached(cache_key)):
+            # 2. Generate SVG (first use of self.tk loads the file)
+            self.svg_string = self.tk.renderToSVG(1)
+            
+            # 3. Extract MIDI/timing data from Verovio
+            self.midi_data = self._extract_midi_data()
+            
+            if cache_key:
+                self._store_cached(cache_key)
         
         print(f"MIDI data extracted for {len(self.midi_data)} elements")
         
@@ -74,20 +234,23 @@ class VerovioScore(VGroup):
         self.color_mapper = ColorIDMapper()
         
         # Only care about elements we have MIDI data for
-        ids_to_map = list(self.midi_data.keys())
+        ids_to_map = frozenset(self.midi_data)
         
         # Inject colors!
-        colored_svg = inject_colors_to_svg(self.svg_string, ids_to_map, self.color_mapper)
+        colored_svg = inject_colors_to_svg(self.svg_string, ids_to_map, self.color_mapper, as_bytes=True)
+        self._color_keys, self._color_ids = self.color_mapper.get_key_table()
         
         # 5. Load visual in Manim
-        temp_path = Path("output") / "temp_verovio_score.svg"
-        temp_path.parent.mkdir(exist_ok=True)
-        
-        with open(temp_path, "w", encoding="utf-8") as f:
+        # SVGMobject only reads from a path; keep the file in RAM where possible
+        tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        with tempfile.NamedTemporaryFile("wb", suffix=".svg", dir=tmp_dir, delete=False) as f:
             f.write(colored_svg)
         
         # Load SVG into Manim - Manim will parse the colors we injected
-        self.visual_score = SVGMobject(str(temp_path))
+        try:
+            self.visual_score = SVGMobject(f.name)
+        finally:
+            os.remove(f.name)
         
         if self.scrolling:
             # Huge width causes auto-scaling to make it tiny. 
@@ -105,49 +268,212 @@ class VerovioScore(VGroup):
         # This overwrites the "hack" colors
         self.set_color(BLACK)
     
+    @property
+    def tk(self) -> "verovio.toolkit":
+        """The Verovio toolkit with this score loaded (loaded on first access after a cache hit)."""
+        if not self._tk_loaded:
+            # Verovio seeds one process-wide id generator in setOptions, so
+            # re-seed right before loading: other loads since then moved it on
+            if self._id_seed:
+                self._tk.setOptions({"xmlIdSeed": self._id_seed})
+            if not self._tk.loadFile(self.musicxml_path):
+                raise ValueError(f"Could not load {self.musicxml_path}")
+            self._tk_loaded = True
+        return self._tk
+    
+    def _cache_key(self, options: Dict) -> Optional[str]:
+        """
+        Content hash of the MusicXML file, the Verovio options, the
+        Verovio version and _CACHE_VERSION (None if the file cannot be read,
+        or if Verovio would assign random ids: cached ids must match the
+        ones self.tk gets when it loads the file).
+        """
+        if not options.get("xmlIdSeed"):
+            return None
+        try:
+            with open(self.musicxml_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        h = hashlib.sha256(data)
+        h.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        h.update(self._tk.getVersion().encode("utf-8"))
+        h.update(str(_CACHE_VERSION).encode("utf-8"))
+        return h.hexdigest()
+    
+    def _load_cached(self, key: str) -> bool:
+        """Load svg_string, midi_data and part_list from the disk cache."""
+        entry = _CACHE_DIR / key
+        try:
+            svg_string = (entry / "score.svg").read_text(encoding="utf-8")
+            with open(entry / "midi.json", "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except Exception:
+            return False
+        self.svg_string = svg_string
+        self.midi_data = cached["midi_data"]
+        self.part_list = cached["part_list"]
+        return True
+    
+    def _store_cached(self, key: str):
+        """Write svg_string, midi_data and part_list to the disk cache."""
+        entry = _CACHE_DIR / key
+        try:
+            entry.mkdir(parents=True, exist_ok=True)
+            # JSON last: its presence marks a complete entry
+            (entry / "score.svg").write_text(self.svg_string, encoding="utf-8")
+            tmp = entry / "midi.json.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"midi_data": self.midi_data, "part_list": self.part_list}, f)
+            os.replace(tmp, entry / "midi.json")
+        except Exception as e:
+            print(f"Warning writing score cache: {e}")
+    
     def _extract_midi_data(self) -> Dict:
         """
         Extract timing and MIDI data from Verovio.
         """
-        import xml.etree.ElementTree as ET
-        import re
-        import json
         midi_map = {}
         
+        # Element attributes, decoded once per id. Staves, slurs, ties and
+        # dynamics are pre-filled from the MEI pass; anything else is asked
+        # of the toolkit.
+        attr_cache = {}
+        def get_attrs(eid):
+            attrs = attr_cache.get(eid)
+            if attrs is None:
+                attrs = self.tk.getElementAttr(eid)
+                if isinstance(attrs, str): attrs = _JSON_DECODE(attrs)
+                attr_cache[eid] = attrs
+            return attrs
+        
         # 0. MAP STAVES TO INSTRUMENTS (via MEI)
         # We need to know which staff number (n) belongs to which part index (P1, P2...).
+        # The MEI is streamed once: every structure we need later (parts,
+        # layer streams, articulations, beams, dynamics) is harvested as its
+        # element closes, and each finished measure is dropped so the whole
+        # tree is never held in memory.
+        dur_map = {'long': 16, 'breve': 8, '1': 4, '2': 2, '4': 1, '8': 0.5, '16': 0.25, '32': 0.125, '64': 0.0625}
+        
+        def get_ppq(el):
+            d = el.get('dur')
+            val = dur_map.get(d, 0)
+            if el.get('dots') == '1': val *= 1.5
+            return val
+
+        def get_id(node):
+            return node.get(_XML_ID) or node.get('id')
+
         staff_to_part_idx = {} # {staff_n: part_index}
+        parts_found = {} # {part_id: [staff_n]}
+        all_staff_ns = []
+        streams = {} # (staff_n, layer_n) -> [(id, tag, ppq)]
+        dynam_values = {}
+        artic_to_note = {} # artic_id -> note_id
+        beam_to_notes = {} # beam_id -> [note_id]
+        note_pitch = {} # note_id -> written MIDI pitch (what getMIDIValuesForElement reports)
         try:
-            # 1. Get MEI and STRIP NAMESPACES for total reliability
+            # 1. Get MEI (lxml resolves the namespaces, no need to strip them)
             mei = self.tk.getMEI()
-            # Remove all xmlns="..." and prefixes like mei: or xml:
-            mei_clean = re.sub(r' xmlns(:[a-z]+)?="[^"]+"', '', mei)
-            mei_clean = re.sub(r'([a-z]+):id=', r'id=', mei_clean)
-            
-            mei_root = ET.fromstring(mei_clean)
+            mei_tags = tuple(f"{{{_MEI_NS}}}{t}" for t in
+                             ('staffDef', 'staffGrp', 'layer', 'note', 'beam', 'dynam', 'measure',
+                              'staff', 'slur', 'tie', 'hairpin'))
             
-            # Find all parts
-            # We look for staffDef or staffGrp that have an id starting with 'P'
-            parts_found = {} # {part_id: [staff_n]}
-            
-            for elem in mei_root.iter():
-                eid = elem.get('id')
-                if eid and eid.startswith('P') and len(eid) < 8:
-                    if elem.tag == 'staffDef':
-                        s_n = elem.get('n')
-                        if s_n: parts_found[eid] = [s_n]
-                    elif elem.tag == 'staffGrp':
-                        staves = [sd.get('n') for sd in elem.findall(".//staffDef")]
+            for _, elem in etree.iterparse(BytesIO(mei.encode('utf-8')), events=('end',), tag=mei_tags):
+                tag = etree.QName(elem).localname
+                eid = elem.get(_XML_ID)
+                
+                if tag in ('staff', 'slur', 'tie', 'hairpin', 'dynam') and eid:
+                    # Same attributes getElementAttr would report (n, startid, endid, staff)
+                    attr_cache[eid] = dict(elem.attrib)
+                
+                if tag == 'staffDef':
+                    s_n = elem.get('n')
+                    if s_n:
+                        all_staff_ns.append(s_n)
+                        # Parts are staffDef or staffGrp that have an id starting with 'P'
+                        if eid and eid.startswith('P') and len(eid) < 8:
+                            parts_found[eid] = [s_n]
+                
+                elif tag == 'staffGrp':
+                    if eid and eid.startswith('P') and len(eid) < 8:
+                        staves = _STAFF_NS_XPATH(elem)
                         if staves: parts_found[eid] = staves
+                
+                elif tag == 'layer':
+                    # Collect elements across the entire score into continuous streams per (Staff, Layer)
+                    staff = next(elem.iterancestors(f"{{{_MEI_NS}}}staff"), None)
+                    if staff is None: continue
+                    key = (staff.get('n', '1'), elem.get('n', '1'))
+                    if key not in streams: streams[key] = []
+                    layer_elems = streams[key]
+                    
+                    # Flatten layer elements
+                    def flatten(node):
+                        tag = etree.QName(node).localname
+                        if tag in ['note', 'rest', 'chord', 'beam', 'mRest']:
+                            if tag == 'beam': 
+                                for child in node.iterchildren(etree.Element): flatten(child)
+                            elif tag == 'chord':
+                                f_note = node.find(".//mei:note", _NS)
+                                if f_note is None: 
+                                     for child in node:
+                                         if 'note' in child.tag: 
+                                             f_note = child; break
+                                if f_note is not None:
+                                    layer_elems.append((get_id(f_note), 'note', get_ppq(f_note)))
+                            else:
+                                layer_elems.append((get_id(node), tag, get_ppq(node)))
+                    
+                    for item in elem.iterchildren(etree.Element): flatten(item)
+                
+                elif tag == 'note':
+                    if eid:
+                        # Map Articulations -> Parent Notes
+                        for child in elem.iterchildren(etree.Element):
+                            child_id = child.get(_XML_ID)
+                            if child_id: artic_to_note[child_id] = eid
+                        
+                        # Written pitch: step + octave + (gestural) accidental
+                        pname, octave = elem.get('pname'), elem.get('oct')
+                        if pname in _PITCH_STEPS and octave and octave.lstrip('-').isdigit():
+                            acc = elem.get('accid.ges') or elem.get('accid')
+                            if acc is None:
+                                accid = elem.find('mei:accid', _NS)
+                                if accid is not None: acc = accid.get('accid.ges') or accid.get('accid')
+                            note_pitch[eid] = 12 * (int(octave) + 1) + _PITCH_STEPS[pname] + _ACCID_SEMITONES.get(acc, 0)
+                
+                elif tag == 'beam':
+                    beam_to_notes[eid] = elem.xpath('.//mei:note/@xml:id', namespaces=_NS, smart_strings=False)
+                
+                elif tag == 'dynam':
+                    if eid:
+                        # Try text content or text child
+                        text = elem.text
+                        if not text:
+                            tchild = elem.find("mei:text", _NS)
+                            if tchild is not None: text = tchild.text
+                        dynam_values[eid] = text.strip() if text else ""
+                
+                elif tag == 'measure':
+                    # Everything inside has been harvested; free it
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
             
             # If nothing found with 'P', fallback to all individual staves as parts
             if not parts_found:
-                for sd in mei_root.findall(".//staffDef"):
-                    s_n = sd.get('n')
-                    if s_n: parts_found[f"S{s_n}"] = [s_n]
+                for s_n in all_staff_ns:
+                    parts_found[f"S{s_n}"] = [s_n]
 
-            # Natural sort by part number (P1, P2...)
-            sorted_part_ids = sorted(parts_found.keys(), key=lambda x: int(re.search(r'\d+', x).group()) if re.search(r'\d+', x) else 0)
+            # Order parts by their lowest staff number (score order, even if
+            # @n values appear out of order), then by part number (P1, P2...)
+            def part_order(p_id):
+                staves = [int(n) for n in parts_found[p_id] if n.isdigit()]
+                num = _PART_NUM_RE.search(p_id)
+                return (min(staves) if staves else 0, int(num.group()) if num else 0)
+            
+            sorted_part_ids = sorted(parts_found, key=part_order)
             
             for p_idx, p_id in enumerate(sorted_part_ids):
                 for s_n in parts_found[p_id]:
@@ -159,54 +485,100 @@ class VerovioScore(VGroup):
             self.part_list = ["default"]
 
         # 1. PARSE SVG FOR HIERARCHY
-        # Map element_id to its parent staff number
+        # One walk over the SVG: map element_id to its parent staff number and
+        # sort the ids of every <g> into lists by data-class
         id_to_staff_n = {}
+        all_note_ids = []
+        slur_tie_items = [] # [(data-id, 'slur'|'tie')]
+        dyn_items = []      # [(data-id, 'hairpin'|'dynam')]
+        artic_ids = []
+        beam_ids = []
         try:
-            # Clean SVG namespaces
-            svg_clean = re.sub(' xmlns="[^"]+"', '', self.svg_string, count=1)
-            svg_root = ET.fromstring(svg_clean)
-            
-            for staff in svg_root.findall(".//g[@data-class='staff']"):
-                s_id = staff.get('data-id')
-                if not s_id: continue
+            # (element, staff n) of the enclosing staff groups (n None if unknown).
+            # Ends are matched by identity, so no attribute is read on end events
+            staff_stack = []
+            svg_events = etree.iterparse(BytesIO(self.svg_string.encode('utf-8')), events=('start', 'end'))
+            for event, elem in svg_events:
+                if event == 'end':
+                    if staff_stack and elem is staff_stack[-1][0]:
+                        staff_stack.pop()
+                        # Staff fully mapped; free it and any earlier siblings
+                        elem.clear()
+                        while elem.getprevious() is not None:
+                            del elem.getparent()[0]
+                    continue
                 
-                # Get staff number 'n'
-                try:
-                    s_attrs = self.tk.getElementAttr(s_id)
-                    if isinstance(s_attrs, str):
-                        s_attrs = json.loads(s_attrs)
-                    s_n = s_attrs.get('n')
-                    
-                    if s_n:
-                        # Mark all children (notes, etc) as belonging to this staff n
-                        for elem in staff.iter():
-                            e_id = elem.get('data-id')
-                            if e_id:
-                                id_to_staff_n[e_id] = s_n
-                except: pass
+                eid = elem.get('data-id')
+                cls = elem.get('data-class')
+                if cls == 'staff':
+                    # Get staff number 'n'
+                    s_n = None
+                    if eid:
+                        try: s_n = get_attrs(eid).get('n')
+                        except: pass
+                    staff_stack.append((elem, s_n))
+                
+                if not eid: continue
+                # Mark all children (notes, etc) as belonging to this staff n
+                if staff_stack and staff_stack[-1][1]:
+                    id_to_staff_n[eid] = staff_stack[-1][1]
+                
+                if elem.tag != _SVG_G or not cls: continue
+                if cls == 'note':
+                    all_note_ids.append(eid)
+                elif cls == 'slur' or cls == 'tie':
+                    slur_tie_items.append((eid, cls))
+                elif cls == 'hairpin' or cls == 'dynam':
+                    dyn_items.append((eid, cls))
+                elif cls == 'beam':
+                    beam_ids.append(eid)
+                elif 'artic' in cls:
+                    # SVG might use 'artic technical', so match any class containing 'artic'
+                    artic_ids.append(eid)
         except Exception as e:
             print(f"Warning parsing SVG hierarchy: {e}")
 
         # 2. EXTRACT NOTES
-        note_pattern = r'data-id="([^"]+)" [^>]*data-class="note"'
-        all_note_ids = re.findall(note_pattern, self.svg_string)
+        # One timemap render gives every note's on/off time (ms); pitch comes
+        # from the MEI pass. getMIDIValuesForElement is only the fallback.
+        note_on, note_off = {}, {}
+        try:
+            timemap = self.tk.renderToTimemap()
+            if isinstance(timemap, str): timemap = _JSON_DECODE(timemap)
+            for entry in timemap:
+                t_ms = entry.get('tstamp', 0)
+                for nid in entry.get('on', ()): note_on.setdefault(nid, t_ms)
+                for nid in entry.get('off', ()): note_off[nid] = t_ms
+        except Exception as e:
+            print(f"Warning reading timemap: {e}")
         
         for note_id in all_note_ids:
             try:
-                info = self.tk.getMIDIValuesForElement(note_id)
-                if info:
-                    # Get part index for this note
-                    s_n = id_to_staff_n.get(note_id)
-                    p_idx = staff_to_part_idx.get(s_n, 0)
-                    
-                    midi_map[note_id] = {
-                        'start': info.get('time', 0) / 1000.0,
-                        'duration': info.get('duration', 0) / 1000.0,
-                        'pitch': info.get('pitch', 60),
-                        'element_class': 'note',
-                        'part_index': p_idx,
-                        'staff_n': s_n
-                    }
+                # Get part index for this note
+                s_n = id_to_staff_n.get(note_id)
+                p_idx = staff_to_part_idx.get(s_n, 0)
+                
+                if note_id in note_on and note_id in note_pitch:
+                    t_on = note_on[note_id]
+                    time_ms = t_on
+                    dur_ms = note_off.get(note_id, t_on) - t_on
+                    # Written pitch, also on transposing staves (trans.semi)
+                    pitch = note_pitch[note_id]
+                else:
+                    info = self.tk.getMIDIValuesForElement(note_id)
+                    if not info: continue
+                    time_ms = info.get('time', 0)
+                    dur_ms = info.get('duration', 0)
+                    pitch = info.get('pitch', 60)
+                
+                midi_map[note_id] = {
+                    'start': time_ms / 1000.0,
+                    'duration': dur_ms / 1000.0,
+                    'pitch': pitch,
+                    'element_class': 'note',
+                    'part_index': p_idx,
+                    'staff_n': s_n
+                }
             except:
                 pass
 
@@ -219,17 +591,13 @@ class VerovioScore(VGroup):
                 if s_n not in staff_time_map: staff_time_map[s_n] = []
                 # We'll fill x_coord during metadata attachment
         
-        # 4. EXTRACT SLURS AND TIES (Keep as is, they use startid)
-        # ... (rest of old code)
-        matches = re.findall(r'<g [^>]*data-id="([^"]+)" [^>]*data-class="(slur|tie)"', self.svg_string)
-        
+        # 4. EXTRACT SLURS AND TIES (they use startid)
         slur_count = 0
         tie_count = 0
-        for eid, cls in matches:
+        for eid, cls in slur_tie_items:
             try:
-                attrs = self.tk.getElementAttr(eid)
+                attrs = get_attrs(eid)
                 if not attrs: continue
-                if isinstance(attrs, str): attrs = json.loads(attrs)
                 
                 start_id = attrs.get('startid')
                 if start_id:
@@ -261,61 +629,18 @@ class VerovioScore(VGroup):
 
         # 4.5. RESOLVE RESTS VIA MEI SEQUENCING
         # Build timeline per layer to solve Rest timing accurately
-        dur_map = {'long': 16, 'breve': 8, '1': 4, '2': 2, '4': 1, '8': 0.5, '16': 0.25, '32': 0.125, '64': 0.0625}
-        
-        def get_ppq(el):
-            d = el.get('dur')
-            val = dur_map.get(d, 0)
-            if el.get('dots') == '1': val *= 1.5
-            return val
-
+        # (streams of (id, tag, ppq) were collected during the MEI pass)
         try:
-            def get_id(node):
-                return node.get('{http://www.w3.org/XML/1998/namespace}id') or node.get('id')
-            
-            # Collect elements across the entire score into continuous streams per (Staff, Layer)
-            streams = {} # (staff_n, layer_n) -> [elements]
-
-            for measure in mei_root.findall(".//measure"):
-                for staff in measure.findall(".//staff"):
-                    s_n = staff.get('n', '1')
-                    for layer in staff.findall(".//layer"):
-                        l_n = layer.get('n', '1')
-                        key = (s_n, l_n)
-                        if key not in streams: streams[key] = []
-                        
-                        # Flatten layer elements
-                        layer_elems = []
-                        def flatten(node):
-                            tag = node.tag.split('}')[-1]
-                            if tag in ['note', 'rest', 'chord', 'beam', 'mRest']:
-                                if tag == 'beam': 
-                                    for child in node: flatten(child)
-                                elif tag == 'chord':
-                                    f_note = node.find(".//note") 
-                                    if f_note is None: 
-                                         for child in node:
-                                             if 'note' in child.tag: 
-                                                 f_note = child; break
-                                    if f_note is not None: layer_elems.append(f_note)
-                                else:
-                                    layer_elems.append(node)
-                        
-                        for item in layer: flatten(item)
-                        streams[key].extend(layer_elems)
-
             # Process each stream independently
             for key, elements in streams.items():
                 s_n = key[0]
                 
                 sync_indices = []
-                for i, el in enumerate(elements):
-                    eid = get_id(el)
+                for i, (eid, _, _) in enumerate(elements):
                     if eid and eid in midi_map: sync_indices.append(i)
                 
                 def add_rest_to_map(el, t_start, t_dur, ref_info):
-                    eid_gap = get_id(el)
-                    tag = el.tag.split('}')[-1]
+                    eid_gap, tag, _ = el
                     if tag in ['rest', 'mRest'] and eid_gap:
                         midi_map[eid_gap] = {
                             'start': t_start,
@@ -329,15 +654,15 @@ class VerovioScore(VGroup):
                      # Calculate PPQ Factor from first sync note
                      idx0 = sync_indices[0]
                      node0 = elements[idx0]
-                     info0 = midi_map.get(get_id(node0))
-                     ppq0 = get_ppq(node0)
+                     info0 = midi_map.get(node0[0])
+                     ppq0 = node0[2]
                      ppq_factor = info0['duration'] / ppq0 if ppq0 > 0 else 0.125
                      
                      # 1. Leading Gap (Backwards)
                      current_end = info0['start']
                      for k in range(idx0 - 1, -1, -1):
                          el = elements[k]
-                         dur = get_ppq(el) * ppq_factor
+                         dur = el[2] * ppq_factor
                          start = current_end - dur
                          add_rest_to_map(el, start, dur, info0)
                          current_end = start
@@ -351,8 +676,8 @@ class VerovioScore(VGroup):
                             start_node = elements[i_start]
                             end_node = elements[i_end]
                             
-                            info1 = midi_map.get(get_id(start_node))
-                            info2 = midi_map.get(get_id(end_node))
+                            info1 = midi_map.get(start_node[0])
+                            info2 = midi_map.get(end_node[0])
                             if not info1 or not info2: continue
 
                             t1 = info1['start'] + info1['duration']
@@ -360,27 +685,27 @@ class VerovioScore(VGroup):
                             total_time = max(0, t2 - t1)
                             
                             gap_elements = elements[i_start+1 : i_end]
-                            total_ppq = sum(get_ppq(e) for e in gap_elements)
+                            total_ppq = sum(e[2] for e in gap_elements)
                             
                             if total_ppq > 0:
                                 ip_factor = total_time / total_ppq
                                 current_t = t1
                                 for e in gap_elements:
-                                    dur_sec = get_ppq(e) * ip_factor
+                                    dur_sec = e[2] * ip_factor
                                     add_rest_to_map(e, current_t, dur_sec, info1)
                                     current_t += dur_sec
                      
                      # 3. Trailing Gap (Forwards)
                      idx_last = sync_indices[-1]
                      node_last = elements[idx_last]
-                     info_last = midi_map.get(get_id(node_last))
-                     ppq_last = get_ppq(node_last)
+                     info_last = midi_map.get(node_last[0])
+                     ppq_last = node_last[2]
                      if ppq_last > 0: ppq_factor = info_last['duration'] / ppq_last
                      
                      current_start = info_last['start'] + info_last['duration']
                      for k in range(idx_last + 1, len(elements)):
                          el = elements[k]
-                         dur = get_ppq(el) * ppq_factor
+                         dur = el[2] * ppq_factor
                          add_rest_to_map(el, current_start, dur, info_last)
                          current_start += dur
         except Exception as e: 
@@ -393,29 +718,14 @@ class VerovioScore(VGroup):
         except: pass
 
         # 5. EXTRACT DYNAMICS (Timing will be resolved spatially in Manim)
-        # Parse MEI for dynamic values (p, f, etc.)
-        dynam_values = {}
-        try:
-            for d in mei_root.findall(".//dynam"):
-                did = d.get('id')
-                if did:
-                    # Try text content or text child
-                    text = d.text
-                    if not text:
-                        tchild = d.find("text")
-                        if tchild is not None: text = tchild.text
-                    dynam_values[did] = text.strip() if text else ""
-        except: pass
-
-        dyn_matches = re.findall(r'<g [^>]*data-id="([^"]+)" [^>]*data-class="(hairpin|dynam)"', self.svg_string)
+        # (dynamic values (p, f, etc.) were read during the MEI pass)
         dyn_count = 0
         hairpin_count = 0
         
-        for eid, cls in dyn_matches:
+        for eid, cls in dyn_items:
             try:
-                attrs = self.tk.getElementAttr(eid)
+                attrs = get_attrs(eid)
                 if not attrs: continue
-                if isinstance(attrs, str): attrs = json.loads(attrs)
                 
                 s_n = attrs.get('staff', '1')
                 p_idx = staff_to_part_idx.get(s_n, 0)
@@ -436,22 +746,9 @@ class VerovioScore(VGroup):
             except Exception: pass
         
         # 6. EXTRACT ARTICULATIONS
-        # Parse MEI to map Articulations -> Parent Notes
-        artic_to_note = {} # artic_id -> note_id
-        try:
-            for note in mei_root.findall(".//note"):
-                note_id = note.get('id')
-                if not note_id: continue
-                for child in note:
-                    child_id = child.get('id')
-                    if child_id: artic_to_note[child_id] = note_id
-        except: pass
+        # (Articulations -> Parent Notes were mapped during the MEI pass)
 
-        # Find articulations in SVG
-        # Note: SVG might use 'artic technical' so we match data-class="artic" or similar
-        artic_matches = re.findall(r'<g [^>]*data-id="([^"]+)" [^>]*data-class="([^"]+)"', self.svg_string)
-        # Filter for classes containing 'artic'
-        artic_ids = [eid for eid, cls in artic_matches if 'artic' in cls]
+        # (articulation ids were collected during the SVG pass)
         
         artic_count = 0
         for aid in artic_ids:
@@ -470,33 +767,28 @@ class VerovioScore(VGroup):
                 artic_count += 1
         
         # 7. EXTRACT BEAMS
-        # Map Beam ID -> List of Note IDs
-        beam_to_notes = {}
-        try:
-            for beam_el in mei_root.findall(".//beam"):
-                bid = beam_el.get('id')
-                # Try getting children via finding all nested notes
-                child_notes = [n.get('id') for n in beam_el.findall(".//note")]
-                beam_to_notes[bid] = child_notes
-        except: pass
-
-        beam_matches = re.findall(r'<g [^>]*data-id="([^"]+)" [^>]*data-class="(beam)"', self.svg_string)
+        # (Beam ID -> List of Note IDs was collected during the MEI pass)
         beam_count = 0
-        for bid, cls in beam_matches:
-            c_notes = beam_to_notes.get(bid, [])
-            # Filter children present in midi_map
-            valid_notes = [n for n in c_notes if n in midi_map]
+        for bid in beam_ids:
+            # Time span of the children present in midi_map, accumulated in
+            # one pass: earliest start, latest (start + duration)
+            first_info = None
+            for n in beam_to_notes.get(bid, ()):
+                info = midi_map.get(n)
+                if info is None: continue
+                n_start = info['start']
+                n_end = n_start + info['duration']
+                if first_info is None:
+                    # Use info from first note for part/staff
+                    first_info = info
+                    start_time, end_time = n_start, n_end
+                else:
+                    if n_start < start_time: start_time = n_start
+                    if n_end > end_time: end_time = n_end
             
-            if valid_notes:
-                # Find time span
-                start_time = min(midi_map[n]['start'] for n in valid_notes)
-                # End time is max of (start + duration)
-                end_time = max(midi_map[n]['start'] + midi_map[n]['duration'] for n in valid_notes)
+            if first_info is not None:
                 duration = end_time - start_time
                 
-                # Use info from first note for part/staff
-                first_info = midi_map[valid_notes[0]]
-                
                 midi_map[bid] = {
                     'start': start_time,
                     'duration': max(0.1, duration),
@@ -519,49 +811,54 @@ class VerovioScore(VGroup):
         """
         matched_count = 0
         
-        # staff_n -> list of (x_coord, time)
-        staff_anchors = {} 
-        
         # 1. PASS ONE: FIND NOTES AND COLLECT ANCHORS
         all_matched = [] # List of (mobject, recovered_id)
         
-        def first_pass(mob):
-            recovered_id = None
-            if isinstance(mob, VMobject):
-                try:
-                    fill = mob.get_fill_color()
-                    if fill:
-                         r, g, b = fill.to_rgb()
-                    else:
-                        raise ValueError()
-
-                    if mob.get_fill_opacity() == 0:
-                        stroke = mob.get_stroke_color()
-                        if stroke:
-                            r, g, b = stroke.to_rgb()
-                        else:
-                            raise ValueError()
-                    
-                    recovered_id = self.color_mapper.get_id_from_rgb(r, g, b)
-                except:
-                    pass
-                
-            if recovered_id and recovered_id in self.midi_data:
-                midi_info = self.midi_data[recovered_id]
-                all_matched.append((mob, recovered_id))
-                
-                if midi_info.get('element_class') == 'note':
-                    s_n = midi_info.get('staff_n', '1')
-                    if s_n not in staff_anchors: staff_anchors[s_n] = []
-                    # Add start anchor (center X)
-                    staff_anchors[s_n].append((mob.get_x(), midi_info['start']))
-                    # Add end anchor (right X) to support durations spanning the full note
-                    staff_anchors[s_n].append((mob.get_right()[0], midi_info['start'] + midi_info['duration']))
+        # Buffer every VMobject with its ID-carrying color (fill, or stroke
+        # when the fill is transparent), then decode them all in one go
+        mobs = []
+        rgbs = []
+        
+        # Only leaves carry the injected color; groups are just descended into
+        stack = [self.visual_score]
+        while stack:
+            mob = stack.pop()
+            if mob.submobjects:
+                # Reversed so children are visited in document order
+                stack.extend(reversed(mob.submobjects))
+            elif isinstance(mob, VMobject) and len(mob.points):
+                # Fully transparent (all-zero) colors carry no ID: skip them
+                # here instead of decoding them
+                rgba = mob.get_fill_rgbas()[0]
+                if rgba.any() and rgba[3] == 0:
+                    rgba = mob.get_stroke_rgbas()[0]
+                if rgba.any():
+                    mobs.append(mob)
+                    rgbs.append(rgba[:3])
+        
+        if mobs:
+            rgb_u8 = np.rint(np.array(rgbs) * 255).astype(np.uint8)
+            idx = match_color_keys(rgb_u8, self._color_keys)
             
-            for sub in mob.submobjects:
-                first_pass(sub)
-
-        first_pass(self.visual_score)
+            for i in np.flatnonzero(idx >= 0):
+                recovered_id = self._color_ids[idx[i]]
+                if recovered_id in self.midi_data:
+                    all_matched.append((mobs[i], recovered_id))
+        
+        # X extent of every matched leaf, read once from its points
+        # (get_left/get_x/get_right would each rescan them)
+        x_extents = np.array([(xs.min(), xs.max()) for xs in (m.points[:, 0] for m, _ in all_matched)]).reshape(-1, 2)
+        x_min, x_max = x_extents[:, 0], x_extents[:, 1]
+        
+        # Notes are the anchors for spatial timing: center X at their start
+        # and right X at their end, to support durations spanning the full note
+        matched_infos = [self.midi_data[rid] for _, rid in all_matched]
+        note_rows = [row for row, info in enumerate(matched_infos) if info.get('element_class') == 'note']
+        note_starts = np.array([matched_infos[row]['start'] for row in note_rows], dtype=float)
+        note_ends = note_starts + np.array([matched_infos[row]['duration'] for row in note_rows], dtype=float)
+        anchor_xs = np.concatenate([(x_min[note_rows] + x_max[note_rows]) / 2, x_max[note_rows]])
+        anchor_ts = np.concatenate([note_starts, note_ends])
+        anchor_staff = np.array([matched_infos[row].get('staff_n', '1') for row in note_rows] * 2, dtype=object)
         
         # DEBUG: Check matched classes
         matched_classes = {}
@@ -574,60 +871,59 @@ class VerovioScore(VGroup):
                 f.write(str(matched_classes))
         except: pass
 
-        # Sort anchors by X
-        for s in staff_anchors:
-            staff_anchors[s].sort()
+        # Sort anchors by X (then time) into columns for binary search, per
+        # staff. Staves without notes of their own fall back to all anchors
+        # (key None)
+        def sorted_anchors(sel):
+            order = np.lexsort((anchor_ts[sel], anchor_xs[sel]))
+            return anchor_xs[sel][order], anchor_ts[sel][order]
+        
+        anchor_cols = {}
+        if note_rows:
+            for s in dict.fromkeys(anchor_staff):
+                anchor_cols[s] = sorted_anchors(anchor_staff == s)
+            anchor_cols[None] = sorted_anchors(slice(None))
 
         # 2. PASS TWO: RESOLVE TIMING
-        for mob, recovered_id in all_matched:
-            midi_info = self.midi_data[recovered_id]
-            e_class = midi_info.get('element_class', 'note')
-            
-            # Resolve spatial timing if needed (Rests from MEI Step 4.5 don't have this flag)
+        # Group the elements needing spatial timing by the anchors they use
+        # (Rests from MEI Step 4.5 don't have this flag)
+        pending = defaultdict(list)
+        for row, midi_info in enumerate(matched_infos):
             if midi_info.get('needs_spatial_timing'):
                 s_n = midi_info.get('staff_n', '1')
-                anchors = staff_anchors.get(s_n, [])
-                if not anchors: # fallback to all anchors
-                    anchors = [a for s in staff_anchors.values() for a in s]
-                    anchors.sort()
+                pending[s_n if s_n in anchor_cols else None].append(row)
+        
+        for s_n, rows in pending.items():
+            if s_n not in anchor_cols: continue
+            xs, ts = anchor_cols[s_n]
+            
+            # Start: right-most anchor to the left of (or aligned with, within
+            # tolerance) the visual start, which preserves causality. With none
+            # to the left the closest anchor is simply the first one.
+            left_idx = np.searchsorted(xs, x_min[rows] + 0.2, side='right') - 1
+            starts = ts[np.maximum(left_idx, 0)]
+            
+            # Hairpin end: the closest anchor generally, usually on the right
+            hairpin_ends = {}
+            hairpins = [row for row in rows if matched_infos[row].get('element_class') == 'hairpin']
+            if hairpins:
+                hairpin_ends = dict(zip(hairpins, ts[nearest_anchor(xs, x_max[hairpins])].tolist()))
+            
+            for row, t_start in zip(rows, starts.tolist()):
+                midi_info = matched_infos[row]
+                midi_info['start'] = t_start
+                e_class = midi_info.get('element_class', 'note')
                 
-                if anchors:
-                    # Find nearest LEFT anchor for start time (preserves causality)
-                    # Using get_left() logic. x_target is the visual start.
-                    x_target = mob.get_left()[0]
-                    
-                    # Filter for anchors that are to the left (or aligned) with tolerance
-                    candidates = [a for a in anchors if a[0] <= x_target + 0.2]
-                    
-                    if candidates:
-                         # Take the right-most of the candidate anchors (closest one to the left)
-                        midi_info['start'] = candidates[-1][1]
-                    else:
-                        # Fallback: closest absolute anchor (probably the first one)
-                        closest = min(anchors, key=lambda a: abs(a[0] - x_target))
-                        midi_info['start'] = closest[1]
-                    
-                    if e_class == 'hairpin':
-                        # Find nearest time for end (right side)
-                        x_end = mob.get_right()[0]
-                        # For end, we want the closest anchor generally, usually on the right
-                        closest_end = min(anchors, key=lambda a: abs(a[0] - x_end))
-                        midi_info['duration'] = max(0.1, closest_end[1] - midi_info['start'])
-                    elif e_class == 'rest':
-                        # Find first anchor AFTER start time to determine duration
-                        try:
-                            t_start = midi_info['start']
-                            found_end = False
-                            for a in anchors:
-                                if a[1] > t_start + 0.1: # Threshold to skip jitter
-                                    midi_info['duration'] = a[1] - t_start
-                                    found_end = True
-                                    break
-                            if not found_end: midi_info['duration'] = 1.0
-                        except:
-                            midi_info['duration'] = 1.0
-                    else:
-                        midi_info['duration'] = 0.5
+                if e_class == 'hairpin':
+                    midi_info['duration'] = max(0.1, hairpin_ends[row] - t_start)
+                elif e_class == 'rest':
+                    # First anchor (by X) AFTER start time determines duration;
+                    # threshold to skip jitter
+                    later = ts > t_start + 0.1
+                    j = int(np.argmax(later))
+                    midi_info['duration'] = float(ts[j]) - t_start if later[j] else 1.0
+                else:
+                    midi_info['duration'] = 0.5
         
         # 3. PASS THREE: COMPUTE OPACITIES
         # Build dynamics and hairpin timelines per staff
@@ -682,76 +978,75 @@ class VerovioScore(VGroup):
         for s in staff_events: staff_events[s].sort()
         for s in staff_hairpins: staff_hairpins[s].sort()
 
-        # Helper to get base opacity at time t
-        def get_base_opacity(s_n, t):
-            timeline = staff_events.get(s_n, [])
-            current = 0.7 # Default
-            for (dt, dop) in timeline:
-                if dt <= t + 0.01:
-                    current = dop
-                else:
-                    break
-            return current
+        # Group elements by staff so each staff's timelines are bound once
+        by_staff = defaultdict(list)
+        for info in self.midi_data.values():
+            by_staff[info.get('staff_n', '1')].append(info)
 
         # Assign opacity to every element
-        for mid, info in self.midi_data.items():
-            t = info['start']
-            s_n = info.get('staff_n', '1')
-            # Base level
-            op = get_base_opacity(s_n, t)
-            
-            # Check if inside hairpin (interpolate)
-            active_hairpin = None
-            if s_n in staff_hairpins:
-                for (h_start, h_end) in staff_hairpins[s_n]:
+        for s_n, staff_infos in by_staff.items():
+            timeline = staff_events.get(s_n, [])
+            times = [dt for (dt, _) in timeline]
+            ops = [dop for (_, dop) in timeline]
+            hairpins = staff_hairpins.get(s_n, [])
+
+            # Helper to get base opacity at time t (last event at or before t)
+            def get_base_opacity(t):
+                i = bisect_right(times, t + 0.01)
+                return ops[i - 1] if i else 0.7 # Default
+
+            for info in staff_infos:
+                t = info['start']
+                # Base level
+                op = get_base_opacity(t)
+                
+                # Check if inside hairpin (interpolate)
+                active_hairpin = None
+                for (h_start, h_end) in hairpins:
                     if h_start <= t <= h_end:
                         active_hairpin = (h_start, h_end)
                         break
-            
-            if active_hairpin:
-                h_start, h_end = active_hairpin
-                
-                # Determine start and end opacities for the hairpin
-                start_op = get_base_opacity(s_n, h_start)
-                
-                # Check if there is a specific dynamic target at h_end
-                timeline = staff_events.get(s_n, [])
-                end_op = None
                 
-                # Look for the FIRST event at or after h_end
-                # This covers cases where the "f" is slightly after the hairpin wedge ends visually
-                if timeline:
-                    # Filter for events after h_end - epsilon
-                    candidates = [(dt, dop) for (dt, dop) in timeline if dt >= h_end - 0.2]
-                    if candidates:
-                        # Take the first one found
-                        cand_t, cand_op = candidates[0]
+                if active_hairpin:
+                    h_start, h_end = active_hairpin
+                    
+                    # Determine start and end opacities for the hairpin
+                    start_op = get_base_opacity(h_start)
+                    
+                    # Check if there is a specific dynamic target at h_end
+                    end_op = None
+                    
+                    # Look for the FIRST event at or after h_end
+                    # This covers cases where the "f" is slightly after the hairpin wedge ends visually
+                    k = bisect_left(times, h_end - 0.2)
+                    if k < len(times):
+                        cand_t, cand_op = timeline[k]
                         # Only accept if it's reasonably close (e.g. within 2 beats/seconds)
                         if cand_t - h_end < 2.0:
                             end_op = cand_op
-                            
-                if end_op is None:
-                    # Fallback inference
-                    if start_op < 0.7: end_op = min(1.0, start_op + 0.3)
-                    else: end_op = max(0.3, start_op - 0.3)
+                                
+                    if end_op is None:
+                        # Fallback inference
+                        if start_op < 0.7: end_op = min(1.0, start_op + 0.3)
+                        else: end_op = max(0.3, start_op - 0.3)
+                    
+                    # Apply gradients metadata to hairpin/beam/slur/tie itself so it can slice properly
+                    if info.get('element_class') in ['hairpin', 'beam', 'slur', 'tie']:
+                        # These elements span time, so they need start/end grad
+                        info['grad_start_op'] = start_op
+                        info['grad_end_op'] = end_op
+                        # Base opacity is start
+                        op = start_op
+                    else:
+                        # Notes/Rests are points in time (mostly)
+                        # Interpolate opacity based on note start time 't'
+                        # Linear Interpolation
+                        total_dur = max(0.01, h_end - h_start)
+                        progress = (t - h_start) / total_dur
+                        progress = max(0.0, min(1.0, progress))
+                        op = start_op + (end_op - start_op) * progress
                 
-                # Apply gradients metadata to hairpin/beam/slur/tie itself so it can slice properly
-                if info.get('element_class') in ['hairpin', 'beam', 'slur', 'tie']:
-                    # These elements span time, so they need start/end grad
-                    info['grad_start_op'] = start_op
-                    info['grad_end_op'] = end_op
-                    # Base opacity is start
-                    op = start_op
-                else:
-                    # Notes/Rests are points in time (mostly)
-                    # Interpolate opacity based on note start time 't'
-                    # Linear Interpolation
-                    total_dur = max(0.01, h_end - h_start)
-                    progress = (t - h_start) / total_dur
-                    progress = max(0.0, min(1.0, progress))
-                    op = start_op + (end_op - start_op) * progress
-            
-            info['opacity'] = op
+                info['opacity'] = op
 
         # 4. PASS FOUR: APPLY METADATA TO MOBJECTS
         for mob, recovered_id in all_matched:
@@ -759,75 +1054,72 @@ class VerovioScore(VGroup):
             e_class = midi_info.get('element_class', 'note')
             
             # Apply metadata
-            if e_class in ['slur', 'tie', 'hairpin', 'beam'] and not hasattr(mob, "is_slice"):
-                num_slices = 100
+            if e_class in ['slur', 'tie']:
+                # Slurs/ties keep their outline; animate_playback reveals a
+                # colored copy of it progressively instead of slicing it
+                mob.note_id = recovered_id
+                mob.start_time = midi_info['start']
+                mob.duration = midi_info['duration']
+                mob.element_class = e_class
+                mob.part_index = midi_info.get('part_index', 0)
+                mob.target_opacity = midi_info.get('opacity', 0.7)
+                g_start = midi_info.get('grad_start_op', mob.target_opacity)
+                mob._reveal_op = (g_start, midi_info.get('grad_end_op', g_start))
+            elif e_class in ['hairpin', 'beam']:
+                # About one slice per frame is all playback can show (max 100)
+                num_slices = min(100, max(4, int(midi_info['duration'] * config.frame_rate) + 1))
                 slices = VGroup()
                 
                 # Gradient values for all sliced elements
                 g_start = midi_info.get('grad_start_op', midi_info.get('opacity', 0.7))
                 g_end = midi_info.get('grad_end_op', g_start)
                 
+                # Sample both edges of the outline in one go: the first half of the
+                # path runs along one edge, the second half back along the other.
+                try:
+                    cum_lengths, segment_starts = _precompute_arclength(mob)
+                    alphas = np.linspace(0.0, 0.5, num_slices + 1)
+                    top = point_from_proportion_batched(mob, alphas, cum_lengths, segment_starts)
+                    bottom = point_from_proportion_batched(mob, 1.0 - alphas, cum_lengths, segment_starts)
+                except Exception:
+                    top = bottom = None
+                
                 if e_class == 'hairpin':
                     # LINEAR SLICING for hairpins (wedge shape)
                     # Generate separate lines for top and bottom to avoid filling
                     stroke_w = mob.get_stroke_width()
                     if stroke_w < 0.5: stroke_w = 3.0 
                     
-                    # Generate raw segments first without worrying about order
-                    raw_segments = []
-                    for i in range(num_slices):
-                        try:
-                            a1 = i / num_slices
-                            a2 = (i + 1) / num_slices
-                            
-                            p1 = mob.point_from_proportion(a1 * 0.5)
-                            p2 = mob.point_from_proportion(a2 * 0.5)
-                            p3 = mob.point_from_proportion(1.0 - (a1 * 0.5))
-                            p4 = mob.point_from_proportion(1.0 - (a2 * 0.5))
-                            
-                            l1 = Line(p1, p2, stroke_width=stroke_w, color=BLACK)
-                            l2 = Line(p3, p4, stroke_width=stroke_w, color=BLACK)
-                            raw_segments.extend([l1, l2])
-                        except: pass
-                    
-                    # SORT BY X to ensure time flows Left -> Right
-                    raw_segments.sort(key=lambda m: m.get_center()[0])
-                    for i, s in enumerate(raw_segments):
-                        s.is_slice = True
-                        alpha = i / len(raw_segments)
-                        s.start_time = midi_info['start'] + alpha * midi_info['duration']
-                        s.part_index = midi_info.get('part_index', 0)
-                        
-                        # Interpolate opacity for this slice
-                        s.target_opacity = g_start + (g_end - g_start) * alpha
-                        slices.add(s)
+                    if top is not None:
+                        # Top and bottom segment of every slice, interleaved
+                        seg_starts = np.stack([top[:-1], bottom[:-1]], axis=1).reshape(-1, top.shape[1])
+                        seg_ends = np.stack([top[1:], bottom[1:]], axis=1).reshape(-1, top.shape[1])
+                        # SORT BY X to ensure time flows Left -> Right. A segment's
+                        # center follows from its ends, so sort before building Lines
+                        order = np.argsort((seg_starts[:, 0] + seg_ends[:, 0]) / 2, kind='stable')
+                        slices.add(*(Line(seg_starts[i], seg_ends[i], stroke_width=stroke_w, color=BLACK) for i in order))
 
                 else:
-                    # LOOP SLICING for Slurs/Ties/Beams (Filled Polygon slices)
-                    # Slurs/Ties/Beams are usually closed paths
-                    raw_polys = []
-                    for i in range(num_slices):
-                        try:
-                            # We assume simple closed loop parameterization
-                            a1 = (i / num_slices) * 0.5
-                            a2 = ((i + 1) / num_slices) * 0.5
-                            p1 = mob.point_from_proportion(a1)
-                            p2 = mob.point_from_proportion(a2)
-                            p3 = mob.point_from_proportion(1.0 - a2)
-                            p4 = mob.point_from_proportion(1.0 - a1)
-                            s = Polygon(p1, p2, p3, p4, stroke_width=0, fill_opacity=1.0, color=BLACK)
-                            raw_polys.append(s)
-                        except: pass
-                    
-                    raw_polys.sort(key=lambda m: m.get_center()[0])
-                    for i, s in enumerate(raw_polys):
-                        s.is_slice = True
-                        alpha = i / len(raw_polys)
-                        s.start_time = midi_info['start'] + alpha * midi_info['duration']
-                        s.part_index = midi_info.get('part_index', 0)
-                        # Interpolate opacity for this slice
-                        s.target_opacity = g_start + (g_end - g_start) * alpha
-                        slices.add(s)
+                    # LOOP SLICING for Beams (Filled Polygon slices)
+                    # Beams are closed paths
+                    # We assume simple closed loop parameterization
+                    if top is not None:
+                        # Same for the quads: center X from their corners
+                        corner_xs = np.stack([top[:-1, 0], top[1:, 0], bottom[1:, 0], bottom[:-1, 0]])
+                        order = np.argsort((corner_xs.max(axis=0) + corner_xs.min(axis=0)) / 2, kind='stable')
+                        slices.add(*(Polygon(top[i], top[i + 1], bottom[i + 1], bottom[i], stroke_width=0, fill_opacity=1.0, color=BLACK) for i in order))
+                
+                # Slice timing lives in parallel arrays on the parent
+                # (index i <-> i-th slice) instead of attributes on every slice
+                n = len(slices.submobjects)
+                alphas = np.linspace(0.0, 1.0, n, endpoint=False)
+                mob._slice_start = midi_info['start'] + alphas * midi_info['duration']
+                # Most spans sit outside any hairpin: no gradient to interpolate
+                if abs(g_start - g_end) < 1e-3:
+                    mob._slice_op = np.full(n, g_start)
+                else:
+                    mob._slice_op = g_start + (g_end - g_start) * alphas
+                mob._slice_part = np.full(n, midi_info.get('part_index', 0), dtype=np.int32)
                 
                 # CRITICAL: CLEAR PARENT GEOMETRY
                 mob.points = np.zeros((0, 3))
@@ -853,98 +1145,43 @@ class VerovioScore(VGroup):
         
         print(f"Color Matching Results:")
         print(f"  - Successfully matched {matched_count} elements in Manim")
-    def get_notes_at_time(self, time: float) -> List[VMobject]:
-        """Get all note mobjects active at a given time."""
-        notes = []
         
-        def check_mobject(mob):
-            if hasattr(mob, 'start_time') and hasattr(mob, 'duration'):
-                if mob.start_time <= time < mob.start_time + mob.duration:
-                    notes.append(mob)
-            for sub in mob.submobjects:
-                check_mobject(sub)
-        
-        check_mobject(self)
-        return notes
+        # Timing is attached; (re)build the get_notes_at_time index lazily
+        self._notes_dirty = True
     
-    def animate_playback(self, scene: Scene, colors=BLUE, color_rests=True):
+    def _build_time_index(self):
         """
-        Helper method to animate the score as if it's playing.
-        'colors' can be a single color or a list of colors (one per instrument).
-        'color_rests': if False, rests will be timed but not visually colored.
+        Index every timed mobject by start time for get_notes_at_time.
+        Set self._notes_dirty = True after changing start_time/duration on
+        any submobject (or adding/removing some) to have it rebuilt.
         """
-        if not isinstance(colors, list):
-            colors = [colors] * (len(getattr(self, 'part_list', [0])) + 1)
-
-        timed_elements = []
-        
-        def collect(mob):
-            # Only collect leaf elements with timing (either notes or slur slices)
-            if hasattr(mob, 'start_time'):
-                if not mob.submobjects or hasattr(mob, "is_slice"):
-                    timed_elements.append(mob)
-            for sub in mob.submobjects:
-                collect(sub)
-        
-        collect(self)
-        if not timed_elements: return
-            
-        # Create a time tracker starting slightly before 0 for a lead-in
-        # This prevents the first note from being already colored when the video starts
-        time_tracker = ValueTracker(-0.5)
-        
-        # Determine highlighting color and apply updaters
-        for element in timed_elements:
-            # Pick color for this instrument
-            p_idx = getattr(element, 'part_index', 0)
-            target_color = colors[p_idx % len(colors)]
-            
-            def update_element(m, dt, col=target_color):
-                t = time_tracker.get_value()
-                # Retrieve element class
-                e_cls = getattr(m, 'element_class', 'note')
-                
-                # Synchronization
-                if t >= m.start_time:
-                    # Skip coloring rests if requested
-                    if e_cls == 'rest' and not color_rests:
-                        # Ensure it stays black (or base color)
-                        m.set_fill(BLACK, opacity=1.0)
-                        m.set_stroke(BLACK, opacity=1.0)
-                        return
-
-                    # Retrieve calculated dynamic opacity
-                    op = getattr(m, 'target_opacity', 0.7)
-                    
-                    # Use set_color for slices (Polygons/Lines) and set_fill for notes
-                    if hasattr(m, "is_slice"):
-                        m.set_color(col)
-                        # For lines, set_stroke is key. For polygons, set_fill.
-                        # Since we now use Lines for hairpins and Polygons for slurs:
-                        m.set_stroke(col, opacity=op) # Affects Lines
-                        m.set_fill(col, opacity=op)   # Affects Polygons
-                    else:
-                        m.set_fill(col, opacity=op)
-                        m.set_stroke(col, opacity=op)
-                else:
-                    m.set_fill(BLACK, opacity=1.0)
-                    m.set_stroke(BLACK, opacity=1.0)
-            
-            element.add_updater(update_element)
-
-        # Total animation duration
-        # We add the 0.5 lead-in + 0.5 buffer at the end
-        max_end = max([e.start_time + getattr(e, 'duration', 0.1) for e in timed_elements])
-        total_time = max_end + 1.0
-        
-        # Animate the time tracker
-        scene.play(time_tracker.animate.set_value(max_end + 0.5), run_time=total_time, rate_func=linear)
+        mobs, starts, ends = [], [], []
+        stack = [self]
+        while stack:
+            mob = stack.pop()
+            if hasattr(mob, 'start_time') and hasattr(mob, 'duration'):
+                mobs.append(mob)
+                starts.append(mob.start_time)
+                ends.append(mob.start_time + mob.duration)
+            stack.extend(reversed(mob.submobjects))
         
-        for element in timed_elements:
-            element.clear_updaters()
+        # Sorted by start; _note_order keeps the tree order for the results
+        order = np.argsort(np.array(starts, dtype=float), kind='stable')
+        self._note_mobs = mobs
+        self._note_order = order
+        self._note_starts = np.array(starts, dtype=float)[order]
+        self._note_ends = np.array(ends, dtype=float)[order]
+        self._notes_dirty = False
+    
+    def get_notes_at_time(self, time: float) -> List[VMobject]:
+        """Get all note mobjects active at a given time."""
+        if getattr(self, '_notes_dirty', True):
+            self._build_time_index()
         
-        if self.scrolling:
-            self.clear_updaters()
+        # Everything that started by `time`, minus what has already ended
+        k = np.searchsorted(self._note_starts, time, side='right')
+        active = np.sort(self._note_order[:k][self._note_ends[:k] > time])
+        return [self._note_mobs[i] for i in active]
     
     def animate_playback(self, scene: Scene, colors=BLUE, color_rests=True, pan_score=None):
         """
@@ -956,21 +1193,55 @@ class VerovioScore(VGroup):
         if pan_score is None:
             pan_score = self.scrolling
 
+        # A single color is shared by every part; no need to index per element
+        single_color = None
         if not isinstance(colors, list):
-            colors = [colors] * (len(getattr(self, 'part_list', [0])) + 1)
+            single_color = colors
+            colors = None
 
+        # How each element is painted, decided once here rather than per frame
+        NOTE, SLICE, MUTED = 0, 1, 2
+        
         timed_elements = []
+        starts, durs, ops, parts, kinds = [], [], [], [], []
+        reveals = [] # slurs/ties, drawn over progressively
         
-        def collect(mob):
-            # Only collect leaf elements with timing (either notes or slur slices)
-            if hasattr(mob, 'start_time'):
-                if not mob.submobjects or hasattr(mob, "is_slice"):
-                    timed_elements.append(mob)
-            for sub in mob.submobjects:
-                collect(sub)
+        stack = [self]
+        while stack:
+            mob = stack.pop()
+            if hasattr(mob, '_reveal_op'):
+                reveals.append(mob)
+                continue
+            # Span elements (hairpins, beams) keep the timing of
+            # their slices in parallel arrays
+            if hasattr(mob, '_slice_start'):
+                n = len(mob.submobjects)
+                timed_elements.extend(mob.submobjects)
+                starts.extend(mob._slice_start)
+                durs.extend([0.1] * n)
+                ops.extend(mob._slice_op)
+                parts.extend(mob._slice_part)
+                kinds.extend([SLICE] * n)
+                continue
+            # Otherwise only collect leaf elements with timing (pass four of
+            # _attach_metadata_via_color sets all of these together)
+            if hasattr(mob, 'start_time') and not mob.submobjects:
+                timed_elements.append(mob)
+                starts.append(mob.start_time)
+                durs.append(mob.duration)
+                ops.append(mob.target_opacity)
+                parts.append(mob.part_index)
+                # Rests are timed but stay black if requested
+                kinds.append(MUTED if mob.element_class == 'rest' and not color_rests else NOTE)
+            stack.extend(reversed(mob.submobjects))
         
-        collect(self)
-        if not timed_elements: return
+        if not timed_elements and not reveals: return
+        
+        # Timing arrays (one entry per timed element)
+        starts = np.array(starts, dtype=float)
+        durs = np.array(durs, dtype=float)
+        r_starts = np.array([m.start_time for m in reveals], dtype=float)
+        r_durs = np.array([max(m.duration, 1e-6) for m in reveals], dtype=float)
             
         # Create a time tracker starting slightly before 0 for a lead-in
         # This prevents the first note from being already colored when the video starts
@@ -978,22 +1249,25 @@ class VerovioScore(VGroup):
         
         # Setup Scrolling if requested
         if pan_score:
-            # Build Time -> X Map
-            time_x_map = []
-            for m in timed_elements:
-                try:
-                    # Use center x
-                    time_x_map.append((m.start_time, m.get_center()[0]))
-                except: pass
+            # Build Time -> X Map, sorted by time. Center x of every (leaf)
+            # element straight from its points, as get_center would give
+            by_time = np.argsort(starts, kind='stable')
+            times = starts[by_time]
+            xs = np.array([(p[:, 0].max() + p[:, 0].min()) / 2 if len(p) else 0.0
+                           for p in (timed_elements[i].points for i in by_time)])
             
-            # Sort by time
-            time_x_map.sort(key=lambda x: x[0])
+            # Slurs/ties are revealed left to right: they contribute their
+            # left edge at their start and their right edge at their end
+            r_timed = [m for m in reveals if len(m.points)]
+            if r_timed:
+                times = np.concatenate([times, [m.start_time for m in r_timed],
+                                        [m.start_time + m.duration for m in r_timed]])
+                xs = np.concatenate([xs, [m.points[:, 0].min() for m in r_timed],
+                                     [m.points[:, 0].max() for m in r_timed]])
+                by_time = np.argsort(times, kind='stable')
+                times, xs = times[by_time], xs[by_time]
             
-            # Extract arrays
-            times = [tx[0] for tx in time_x_map]
-            xs = [tx[1] for tx in time_x_map]
-            
-            if not times: return
+            if not len(times): return
 
             original_origin = self.get_center()
             # Capture ORIGINAL boundaries (Absolute coordinates at start)
@@ -1060,56 +1334,139 @@ class VerovioScore(VGroup):
 
             self.add_updater(scroll_updater)
 
-        # Determine highlighting color and apply updaters
-        for element in timed_elements:
+        # Determine highlighting color for each element. Colors are parsed
+        # once per part here, so painting never re-validates them
+        if colors is None:
+            single_color = ManimColor(single_color)
+        else:
+            colors = [ManimColor(c) for c in colors]
+        
+        def part_color(p_idx):
             # Pick color for this instrument
-            p_idx = getattr(element, 'part_index', 0)
-            target_color = colors[p_idx % len(colors)]
+            return single_color if colors is None else colors[p_idx % len(colors)]
+        
+        target_colors = [part_color(p_idx) for p_idx in parts]
+        
+        def paint_active(m, col, op, kind):
+            # Skip coloring rests if requested
+            if kind == MUTED:
+                # Ensure it stays black (or base color)
+                m.set_fill(BLACK, opacity=1.0)
+                m.set_stroke(BLACK, opacity=1.0)
+                return
             
-            def update_element(m, dt, col=target_color):
-                t = time_tracker.get_value()
-                # Retrieve element class
-                e_cls = getattr(m, 'element_class', 'note')
-                
-                # Synchronization
-                if t >= m.start_time:
-                    # Skip coloring rests if requested
-                    if e_cls == 'rest' and not color_rests:
-                        # Ensure it stays black (or base color)
-                        m.set_fill(BLACK, opacity=1.0)
-                        m.set_stroke(BLACK, opacity=1.0)
-                        return
-
-                    # Retrieve calculated dynamic opacity
-                    op = getattr(m, 'target_opacity', 0.7)
-                    
-                    # Use set_color for slices (Polygons/Lines) and set_fill for notes
-                    if hasattr(m, "is_slice"):
-                        m.set_color(col)
-                        # For lines, set_stroke is key. For polygons, set_fill.
-                        # Since we now use Lines for hairpins and Polygons for slurs:
-                        m.set_stroke(col, opacity=op) # Affects Lines
-                        m.set_fill(col, opacity=op)   # Affects Polygons
-                    else:
-                        m.set_fill(col, opacity=op)
-                        m.set_stroke(col, opacity=op)
-                else:
-                    m.set_fill(BLACK, opacity=1.0)
-                    m.set_stroke(BLACK, opacity=1.0)
+            # Fill colors notes and beam slices (Polygons), stroke colors
+            # hairpin slices (Lines); set_color would only repeat both
+            m.set_fill(col, opacity=op)
+            m.set_stroke(col, opacity=op)
+        
+        def paint_inactive(m):
+            m.set_fill(BLACK, opacity=1.0)
+            m.set_stroke(BLACK, opacity=1.0)
+        
+        # Everything starts black, slurs/ties left colored by an earlier
+        # playback included; from then on only elements whose state flips
+        # are repainted
+        for element in timed_elements:
+            paint_inactive(element)
+        for m in reveals:
+            paint_inactive(m)
+        
+        # Elements in onset order: the active ones are always a prefix, so a
+        # cursor into it tells exactly which elements changed since last frame
+        order = np.argsort(starts, kind='stable')
+        sorted_starts = starts[order]
+        cursor = [0]
+        
+        # Slurs/ties: a colored overlay grows along the outline. The path runs
+        # out along one edge and back along the other, so the revealed part is
+        # the start of each edge, closed by a line across the outline. While
+        # a reveal is under way the outline itself is hidden and a black
+        # remainder draws the part not reached yet, so the colored part sits
+        # on the background like the notes do instead of on top of black.
+        overlays = VGroup()
+        remainders = VGroup()
+        for m in reveals:
+            op = m._reveal_op[0]
+            overlays.add(VMobject(fill_color=part_color(m.part_index), fill_opacity=op, stroke_width=0))
+            remainders.add(VMobject(fill_color=BLACK, fill_opacity=1.0, stroke_width=0))
+        # Scratch path per overlay for the far edge, reused every frame
+        edges = [VMobject() for _ in reveals]
+        r_alphas = np.zeros(len(reveals))
+        
+        def reveal(i, alpha):
+            overlay, remainder, src = overlays[i], remainders[i], reveals[i]
+            if alpha <= 0:
+                overlay.points = np.zeros((0, 3))
+                remainder.points = np.zeros((0, 3))
+                # Not started (or rewound): show the outline again
+                paint_inactive(src)
+                return
+            if r_alphas[i] <= 0:
+                src.set_fill(opacity=0)
+                src.set_stroke(opacity=0)
+            edge = edges[i]
+            edge.pointwise_become_partial(src, 1.0 - alpha / 2, 1.0)
+            overlay.pointwise_become_partial(src, 0.0, alpha / 2)
+            overlay.add_line_to(edge.points[0])
+            overlay.append_points(edge.points)
+            g_start, g_end = src._reveal_op
+            overlay.set_fill(opacity=g_start + (g_end - g_start) * alpha)
+            if alpha < 1:
+                remainder.pointwise_become_partial(src, alpha / 2, 1.0 - alpha / 2)
+            else:
+                remainder.points = np.zeros((0, 3))
+        
+        if reveals:
+            self.add(remainders, overlays)
+        
+        # Bound once; the updater runs every frame
+        get_time = time_tracker.get_value
+        searchsorted = np.searchsorted
+        clip = np.clip
+        flatnonzero = np.flatnonzero
+        
+        # A single updater on the score replaces one updater per element
+        def playback_updater(mob, dt):
+            t = get_time()
+            k = int(searchsorted(sorted_starts, t, side='right'))
+            last_k = cursor[0]
+            if k != last_k:
+                for i in order[last_k:k]:
+                    paint_active(timed_elements[i], target_colors[i], ops[i], kinds[i])
+                # Only if the tracker is rewound
+                for i in order[k:last_k]:
+                    paint_inactive(timed_elements[i])
+                cursor[0] = k
             
-            element.add_updater(update_element)
+            if reveals:
+                alphas = clip((t - r_starts) / r_durs, 0.0, 1.0)
+                for i in flatnonzero(alphas != r_alphas):
+                    reveal(i, alphas[i])
+                    r_alphas[i] = alphas[i]
+        
+        self.add_updater(playback_updater)
         
         # Total animation duration
         # We add the 0.5 lead-in + 0.5 buffer at the end
-        max_end = max([e.start_time + getattr(e, 'duration', 0.1) for e in timed_elements])
+        max_end = float(np.concatenate([starts + durs, r_starts + r_durs]).max())
         total_time = max_end + 1.0
         
         # Animate the time tracker (pass 'scene' to play)
         scene.play(time_tracker.animate.set_value(max_end + 0.5), run_time=total_time, rate_func=linear)
         
         # Cleanup
-        for element in timed_elements:
-            element.clear_updaters()
+        self.remove_updater(playback_updater)
+        if reveals:
+            # Show the slurs/ties again, as colored as the reveal left them
+            for overlay, m, alpha in zip(overlays, reveals, r_alphas):
+                if alpha >= 1:
+                    col, op = overlay.get_fill_color(), overlay.get_fill_opacity()
+                    m.set_fill(col, opacity=op)
+                    m.set_stroke(col, opacity=op)
+                else:
+                    paint_inactive(m)
+            self.remove(remainders, overlays)
         
         if pan_score:
             self.clear_updaters()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from harmonim.renderers import verovio_color_mapper as vcm
+
+
+def _key_table(n):
+    mapper = vcm.ColorIDMapper()
+    for i in range(n):
+        mapper.get_unique_color(f"note-{i}")
+    return mapper
+
+
+def _colors():
+    rng = np.random.default_rng(0)
+    # Small channel values: a mix of keys in the table and keys absent from it
+    return rng.integers(0, 4, size=(500, 3)).astype(np.uint8)
+
+
+def test_numpy_matches_known_and_absent_keys():
+    mapper = _key_table(300)
+    keys, ids = mapper.get_key_table()
+    rgb = _colors()
+    idx = vcm._match_color_keys_numpy(rgb, keys)
+
+    assert (idx >= 0).any() and (idx < 0).any()
+    for (r, g, b), i in zip(rgb, idx):
+        expected = mapper.get_id_from_rgb(r / 255, g / 255, b / 255)
+        assert (ids[i] if i >= 0 else None) == expected
+
+
+def test_numpy_empty_table_and_empty_input():
+    keys = np.zeros(0, dtype=np.uint32)
+    assert (vcm._match_color_keys_numpy(_colors(), keys) == -1).all()
+    assert len(vcm.match_color_keys(np.zeros((0, 3), dtype=np.uint8), _key_table(5).get_key_table()[0])) == 0
+
+
+@pytest.mark.skipif(vcm.njit is None, reason="numba not installed")
+@pytest.mark.parametrize("n_keys", [0, 1, 300])
+def test_jit_agrees_with_numpy(n_keys):
+    keys, _ = _key_table(n_keys).get_key_table()
+    rgb = _colors()
+    expected = vcm._match_color_keys_numpy(rgb, keys)
+    result = vcm._match_color_keys_jit(rgb, keys)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
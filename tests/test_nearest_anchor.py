@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from harmonim import verovio_score as vs
+
+
+def _anchors():
+    rng = np.random.default_rng(0)
+    # Rounded so several anchors share an x: ties go to the first of them
+    xs = np.sort(np.round(rng.uniform(0, 50, 200)))
+    targets = np.concatenate([rng.uniform(-5, 55, 500), xs[:20], (xs[:-1] + xs[1:]) / 2])
+    return xs, targets
+
+
+def test_numpy_picks_first_closest_anchor():
+    xs, targets = _anchors()
+    idx = vs._nearest_anchor_numpy(xs, targets)
+    for t, i in zip(targets, idx):
+        dist = np.abs(xs - t)
+        assert i == np.flatnonzero(dist == dist.min())[0]
+
+
+@pytest.mark.skipif(vs.njit is None, reason="numba not installed")
+def test_jit_agrees_with_numpy():
+    xs, targets = _anchors()
+    np.testing.assert_array_equal(vs._nearest_anchor_jit(xs, targets), vs._nearest_anchor_numpy(xs, targets))